@@ -4,244 +4,443 @@ Tests the correctness properties defined in the design document
 """
 
 import pytest
-import hypothesis
-from hypothesis import given, strategies as st
 import ast
+import hashlib
+import mmap
 import re
 import os
+from functools import cached_property, lru_cache
 from pathlib import Path
-from typing import List, Dict, Set, Tuple
+from typing import List, Dict, Optional, Set, Tuple, Union
+
+try:
+    import re2 as _regex_engine  # google-re2: linear-time automaton engine, same API as re
+except ImportError:
+    _regex_engine = re
+
+
+SOURCE_FILE = 'PersonalDataWareHouse.py'
+DOCS_DIR = '.'
+TECH_SPEC = 'PDW_Technical_Specification.md'
+FUNCTIONAL_SPEC = 'PDW_Functional_Specification.md'
+DEPLOYMENT_GUIDE = 'PDW_Deployment_Guide.md'
+REQUIRED_FILES = (TECH_SPEC, FUNCTIONAL_SPEC, DEPLOYMENT_GUIDE)
+
+# Section headers are expected well within the start of a documentation file
+_HEADER_SCAN_BYTES = 64 * 1024
+
+# Major functions that must appear in the technical specification
+CRITICAL_FUNCTIONS = frozenset({
+    'main', 'new_data_loader', 'create_pivot_history',
+    'xlsx_report_generator', 'sanitize_entries_dataframe'
+})
+
+TECH_SPEC_SECTIONS = (
+    'Executive Summary',
+    'System Architecture',
+    'Database Schema',
+    'Error Handling',
+    'Dependencies and Requirements'
+)
+
+FUNCTIONAL_SPEC_SECTIONS = (
+    'Business Context',
+    'Business Processes',
+    'Business Rules',
+    'User Interactions'
+)
+
+DEPLOYMENT_GUIDE_SECTIONS = (
+    'System Requirements',
+    'Installation Instructions',
+    'Configuration Setup',
+    'Troubleshooting Guide'
+)
+
+REQUIRED_SECTIONS = (
+    (TECH_SPEC, 'Technical specification', TECH_SPEC_SECTIONS),
+    (FUNCTIONAL_SPEC, 'Functional specification', FUNCTIONAL_SPEC_SECTIONS),
+    (DEPLOYMENT_GUIDE, 'Deployment guide', DEPLOYMENT_GUIDE_SECTIONS),
+)
+
+# Word character covering non-ASCII (e.g. Portuguese) names; RE2's \w is ASCII-only
+_WORD = r'\w' if _regex_engine is re else r'[\pL\pM\pN_]'
+
+# Documentation name patterns, fused so each document is scanned only once. They
+# match decoded text so names may contain non-ASCII letters. Each alternative has
+# exactly one capturing group, so a match's name is its last group.
+_FUNCTION_RE = _regex_engine.compile('|'.join((
+    r'`(\w+)\([^`]*\)`',    # `function_name()` / `function_name(args)`
+    r'\*\*(\w+)\*\*',       # **function_name**
+    r'#{3,4} (\w+)',        # ### function_name / #### function_name
+)).replace(r'\w', _WORD))
+
+_COMPONENT_RE = _regex_engine.compile('|'.join((
+    r'#{3,4} (\w+(?:\s+\w+)*)',       # ### Component Name / #### Component Name
+    r'\*\*(\w+(?:\s+\w+)*):\*\*',    # **Component Name:**
+)).replace(r'\w', _WORD))
+
+# Whole-word occurrences of the critical function names, found in one pass
+_CRITICAL_FUNCTION_RE = _regex_engine.compile(b'|'.join(
+    rb'\b' + re.escape(name.encode('utf-8')) + rb'\b' for name in sorted(CRITICAL_FUNCTIONS)
+))
+
+
+def _on_function(node, functions: Set[str], classes: Set[str], imports: Set[str]) -> None:
+    functions.add(node.name)
+
+
+def _on_class(node, functions: Set[str], classes: Set[str], imports: Set[str]) -> None:
+    classes.add(node.name)
+
+
+def _on_import(node, functions: Set[str], classes: Set[str], imports: Set[str]) -> None:
+    for alias in node.names:
+        imports.add(alias.name)
+
+
+def _on_import_from(node, functions: Set[str], classes: Set[str], imports: Set[str]) -> None:
+    if node.module:
+        imports.add(node.module)
+
+
+# Node type -> name collector
+_HANDLERS = {
+    ast.FunctionDef: _on_function,
+    ast.AsyncFunctionDef: _on_function,
+    ast.ClassDef: _on_class,
+    ast.Import: _on_import,
+    ast.ImportFrom: _on_import_from,
+}
+
+# Node type -> fields holding nested statements; other nodes are never descended into
+_BODY_FIELDS = {
+    ast.Module: ('body',),
+    ast.FunctionDef: ('body',),
+    ast.AsyncFunctionDef: ('body',),
+    ast.ClassDef: ('body',),
+    ast.If: ('body', 'orelse'),
+    ast.For: ('body', 'orelse'),
+    ast.AsyncFor: ('body', 'orelse'),
+    ast.While: ('body', 'orelse'),
+    ast.With: ('body',),
+    ast.AsyncWith: ('body',),
+    ast.Try: ('body', 'handlers', 'orelse', 'finalbody'),
+    ast.ExceptHandler: ('body',),
+}
+# Statement types only available on newer Python versions
+for _name, _fields in (('TryStar', ('body', 'handlers', 'orelse', 'finalbody')),
+                       ('Match', ('cases',)),
+                       ('match_case', ('body',))):
+    if hasattr(ast, _name):
+        _BODY_FIELDS[getattr(ast, _name)] = _fields
 
 
 class DocumentationValidator:
     """Validates documentation completeness and accuracy"""
     
-    def __init__(self, source_file: str, docs_dir: str):
+    def __init__(self, source_file: str, docs_dir: str, source_code: Optional[str] = None):
         self.source_file = source_file
         self.docs_dir = docs_dir
-        self.source_functions = self._extract_functions_from_source()
-        self.source_classes = self._extract_classes_from_source()
-        self.source_imports = self._extract_imports_from_source()
-    
-    def _extract_functions_from_source(self) -> Set[str]:
-        """Extract all function names from source code"""
-        with open(self.source_file, 'r', encoding='utf-8') as f:
-            source_code = f.read()
-        
-        tree = ast.parse(source_code)
-        functions = set()
-        
-        for node in ast.walk(tree):
-            if isinstance(node, ast.FunctionDef):
-                functions.add(node.name)
-        
-        return functions
+        if source_code is None:
+            source_code = Path(source_file).read_text(encoding='utf-8')
+        self._source_code = source_code
     
-    def _extract_classes_from_source(self) -> Set[str]:
-        """Extract all class names from source code"""
-        with open(self.source_file, 'r', encoding='utf-8') as f:
-            source_code = f.read()
-        
-        tree = ast.parse(source_code)
-        classes = set()
-        
-        for node in ast.walk(tree):
-            if isinstance(node, ast.ClassDef):
-                classes.add(node.name)
-        
-        return classes
+    @cached_property
+    def _tree(self) -> ast.Module:
+        """Parsed source code, built on first use"""
+        return ast.parse(self._source_code)
     
-    def _extract_imports_from_source(self) -> Set[str]:
-        """Extract all import statements from source code"""
-        with open(self.source_file, 'r', encoding='utf-8') as f:
-            source_code = f.read()
-        
-        tree = ast.parse(source_code)
+    @cached_property
+    def _definitions(self) -> Tuple[Set[str], Set[str], Set[str]]:
+        """Extract function, class and import names from source code in a single pass"""
+        functions = set()
+        classes = set()
         imports = set()
         
-        for node in ast.walk(tree):
-            if isinstance(node, ast.Import):
-                for alias in node.names:
-                    imports.add(alias.name)
-            elif isinstance(node, ast.ImportFrom):
-                if node.module:
-                    imports.add(node.module)
+        # Definitions and imports are statements, so only statement bodies are
+        # descended into; expressions are never visited
+        stack = [self._tree]
+        while stack:
+            node = stack.pop()
+            node_type = type(node)
+            handler = _HANDLERS.get(node_type)
+            if handler is not None:
+                handler(node, functions, classes, imports)
+            for field in _BODY_FIELDS.get(node_type, ()):
+                stack.extend(getattr(node, field))
         
-        return imports
+        return functions, classes, imports
+    
+    @cached_property
+    def source_functions(self) -> Set[str]:
+        """All function names defined in source code"""
+        return self._definitions[0]
+    
+    @cached_property
+    def source_classes(self) -> Set[str]:
+        """All class names defined in source code"""
+        return self._definitions[1]
+    
+    @cached_property
+    def source_imports(self) -> Set[str]:
+        """All modules imported by source code"""
+        return self._definitions[2]
     
     def get_documented_functions(self, doc_content: str) -> Set[str]:
         """Extract function names mentioned in documentation"""
-        # Look for function patterns like `function_name()` or **function_name**
-        function_patterns = [
-            r'`(\w+)\(\)`',  # `function_name()`
-            r'\*\*(\w+)\*\*',  # **function_name**
-            r'### (\w+)',  # ### function_name
-            r'#### (\w+)',  # #### function_name
-        ]
-        
         documented_functions = set()
-        for pattern in function_patterns:
-            matches = re.findall(pattern, doc_content)
-            documented_functions.update(matches)
+        for match in _FUNCTION_RE.finditer(doc_content):
+            documented_functions.add(match.group(match.lastindex))
         
         return documented_functions
     
     def get_documented_components(self, doc_content: str) -> Set[str]:
         """Extract component names mentioned in documentation"""
-        # Look for component patterns
-        component_patterns = [
-            r'### (\w+(?:\s+\w+)*)',  # ### Component Name
-            r'#### (\w+(?:\s+\w+)*)',  # #### Component Name
-            r'\*\*(\w+(?:\s+\w+)*):\*\*',  # **Component Name:**
-        ]
-        
         documented_components = set()
-        for pattern in component_patterns:
-            matches = re.findall(pattern, doc_content)
-            documented_components.update(matches)
+        for match in _COMPONENT_RE.finditer(doc_content):
+            documented_components.add(match.group(match.lastindex))
         
         return documented_components
 
 
-# Property 1: Technical Documentation Completeness
-@given(st.text(min_size=1, max_size=100, alphabet=st.characters(whitelist_categories=('Lu', 'Ll', 'Nd'))))
-def test_technical_documentation_completeness(function_name):
+@lru_cache(maxsize=None)
+def _section_pattern(sections: Tuple[str, ...]):
+    """Alternation over the section titles, longest first, so a document is scanned once"""
+    return _regex_engine.compile(b'|'.join(re.escape(section.encode('utf-8'))
+                                           for section in sorted(sections, key=len, reverse=True)))
+
+
+def _missing_sections(content: bytes, sections: Tuple[str, ...]) -> Set[str]:
+    """
+    Return the section titles that do not occur in content. The single pass only
+    reports non-overlapping matches, so a title that only occurs overlapping another
+    one (e.g. "Setup Guide" inside "Configuration Setup Guide") is confirmed with a
+    direct search before it is reported missing.
+    """
+    found = {match.group().decode('utf-8') for match in _section_pattern(sections).finditer(content)}
+    return {section for section in sections
+            if section not in found and content.find(section.encode('utf-8')) == -1}
+
+
+def _doc_text(content: bytes) -> str:
+    """Decode mapped documentation as a text-mode read would (UTF-8, universal newlines)"""
+    return str(content, 'utf-8').replace('\r\n', '\n').replace('\r', '\n')
+
+
+def _map_file(file_path: str) -> Union[mmap.mmap, bytes]:
+    """
+    Map a file read-only; the OS page cache backs it instead of a decoded copy.
+    Empty files cannot be mapped and are returned as empty bytes.
+    """
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b''
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+@lru_cache(maxsize=None)
+def _read_source(source_file: str) -> str:
+    """Source code text, read once per process"""
+    return Path(source_file).read_text(encoding='utf-8')
+
+
+class _SourceCache(dict):
+    """
+    Source text and memory-mapped documentation, each loaded on first access so a
+    missing or empty file only affects the tests that use it
     """
-    **Feature: pdw-documentation, Property 1: Technical Documentation Completeness**
     
-    For any function, class, or module in the source code, the generated technical 
-    documentation should contain complete descriptions including purpose, parameters, 
-    return values, data structures, and architectural relationships.
+    def __missing__(self, file_path: str) -> Union[str, mmap.mmap, bytes]:
+        if Path(file_path).suffix == '.py':
+            content = _read_source(file_path)
+        else:
+            content = _map_file(file_path)
+        self[file_path] = content
+        return content
     
-    **Validates: Requirements 1.1, 1.2, 1.3, 1.4, 1.5**
+    def close(self) -> None:
+        """Release the mappings so the files are not held open (and locked on Windows)"""
+        for content in self.values():
+            if isinstance(content, mmap.mmap):
+                content.close()
+        self.clear()
+
+
+_SOURCES = _SourceCache()
+
+
+@pytest.fixture(scope='session')
+def pdw_sources() -> Dict[str, Union[str, mmap.mmap, bytes]]:
+    """Source and documentation contents, loaded once per session (once per worker under pytest-xdist)"""
+    yield _SOURCES
+    _SOURCES.close()
+
+
+@lru_cache(maxsize=None)
+def _validator(source_file: str, docs_dir: str) -> DocumentationValidator:
+    """Shared validator instance; the source file does not change during a test run"""
+    return DocumentationValidator(source_file, docs_dir, source_code=_read_source(source_file))
+
+
+def _cached_documented_functions(doc_path: str, cache=None) -> Set[str]:
+    """
+    Extract function names documented in doc_path. When a pytest cache is given the
+    result is persisted there, keyed by the SHA-256 of the extraction pattern and the
+    document, so unchanged documentation is not re-scanned on later runs while a
+    change to either invalidates the entry.
     """
-    # Skip if function name is not valid Python identifier
-    if not function_name.isidentifier():
-        return
+    doc_content = _SOURCES[doc_path]
+    if cache is None:
+        return _validator(SOURCE_FILE, DOCS_DIR).get_documented_functions(_doc_text(doc_content))
     
-    validator = DocumentationValidator('PersonalDataWareHouse.py', '.')
+    hasher = hashlib.sha256(_FUNCTION_RE.pattern.encode('utf-8'))
+    hasher.update(doc_content)
+    digest = hasher.hexdigest()
+    key = f'pdw/documented_functions/{doc_path}'
+    entry = cache.get(key, None)
+    if entry and entry.get('sha256') == digest:
+        return set(entry['functions'])
     
-    # Read technical documentation
+    documented_functions = _validator(SOURCE_FILE, DOCS_DIR).get_documented_functions(_doc_text(doc_content))
+    cache.set(key, {'sha256': digest, 'functions': sorted(documented_functions)})
+    return documented_functions
+
+
+@pytest.fixture(scope='session')
+def tech_doc_functions(request, pdw_sources) -> Set[str]:
+    """Function names documented in the technical specification"""
     try:
-        with open('PDW_Technical_Specification.md', 'r', encoding='utf-8') as f:
-            tech_doc = f.read()
+        # The cache is absent when pytest runs with -p no:cacheprovider
+        return _cached_documented_functions(TECH_SPEC, getattr(request.config, 'cache', None))
     except FileNotFoundError:
         pytest.fail("Technical documentation file not found")
-    
-    # If function exists in source code, it should be documented
-    if function_name in validator.source_functions:
-        documented_functions = validator.get_documented_functions(tech_doc)
-        
-        # Property: All source functions should be documented
-        assert function_name in documented_functions or any(
-            function_name in doc_func for doc_func in documented_functions
-        ), f"Function '{function_name}' found in source but not documented in technical specification"
 
 
-def test_all_source_functions_documented():
+def _name_haystack(names: Set[str]) -> str:
+    """Join names with NUL so a substring check against every name is a single scan"""
+    return '\x00'.join(names)
+
+
+@pytest.fixture(scope='session')
+def tech_doc_haystack(tech_doc_functions) -> str:
+    """Documented function names of the technical specification joined for substring checks"""
+    return _name_haystack(tech_doc_functions)
+
+
+@pytest.fixture(scope='session')
+def undocumented_source_functions(tech_doc_haystack) -> frozenset:
     """
-    Test that all functions in the source code are documented in technical specification
+    Source functions not mentioned in the technical specification. The input is
+    fixed for the session, so each parametrized case reduces to a single set lookup.
     """
-    validator = DocumentationValidator('PersonalDataWareHouse.py', '.')
+    return frozenset(
+        name for name in _validator(SOURCE_FILE, DOCS_DIR).source_functions
+        if name not in tech_doc_haystack
+    )
+
+
+# Every function defined in source, enumerated at collection time; a missing source
+# file leaves the property without cases rather than breaking collection
+try:
+    _SOURCE_FUNCTIONS = sorted(_validator(SOURCE_FILE, DOCS_DIR).source_functions)
+except FileNotFoundError:
+    _SOURCE_FUNCTIONS = []
+
+
+# Property 1: Technical Documentation Completeness
+@pytest.mark.parametrize('function_name', _SOURCE_FUNCTIONS)
+def test_technical_documentation_completeness(undocumented_source_functions, function_name):
+    """
+    **Feature: pdw-documentation, Property 1: Technical Documentation Completeness**
     
-    with open('PDW_Technical_Specification.md', 'r', encoding='utf-8') as f:
-        tech_doc = f.read()
+    For any function, class, or module in the source code, the generated technical 
+    documentation should contain complete descriptions including purpose, parameters, 
+    return values, data structures, and architectural relationships.
     
-    documented_functions = validator.get_documented_functions(tech_doc)
+    **Validates: Requirements 1.1, 1.2, 1.3, 1.4, 1.5**
+    """
+    # Property: All source functions should be documented
+    assert function_name not in undocumented_source_functions, \
+        f"Function '{function_name}' found in source but not documented in technical specification"
+
+
+def test_all_source_functions_documented(pdw_sources):
+    """
+    Test that all functions in the source code are documented in technical specification
+    """
+    validator = _validator(SOURCE_FILE, DOCS_DIR)
     
     # Check that major functions are documented
-    critical_functions = {
-        'main', 'new_data_loader', 'create_pivot_history', 
-        'xlsx_report_generator', 'sanitize_entries_dataframe'
-    }
-    
-    for func in critical_functions:
-        if func in validator.source_functions:
-            assert any(func in doc_func for doc_func in documented_functions), \
-                f"Critical function '{func}' not found in technical documentation"
+    found = {match.group().decode('utf-8')
+             for match in _CRITICAL_FUNCTION_RE.finditer(pdw_sources[TECH_SPEC])}
+    missing = (CRITICAL_FUNCTIONS & validator.source_functions) - found
+    assert not missing, f"Critical functions not found in technical documentation: {sorted(missing)}"
 
 
 def test_documentation_structure_completeness():
     """
     Test that documentation contains all required sections and components
     """
-    required_files = [
-        'PDW_Technical_Specification.md',
-        'PDW_Functional_Specification.md', 
-        'PDW_Deployment_Guide.md'
-    ]
-    
-    for file_path in required_files:
+    for file_path in REQUIRED_FILES:
         assert os.path.exists(file_path), f"Required documentation file '{file_path}' not found"
         
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-            
-        # Check minimum content requirements
-        assert len(content) > 1000, f"Documentation file '{file_path}' appears incomplete (too short)"
-        assert '##' in content, f"Documentation file '{file_path}' missing section headers"
+        # Check minimum content requirements; the size needs no read and the
+        # header check only a bounded, undecoded scan of the mapped file
+        size = os.path.getsize(file_path)
+        assert size > 1000, f"Documentation file '{file_path}' appears incomplete (too short)"
+        
+        with _map_file(file_path) as content:
+            assert content.find(b'##', 0, _HEADER_SCAN_BYTES) != -1, \
+                f"Documentation file '{file_path}' missing section headers"
 
 
-def test_technical_spec_required_sections():
+@pytest.mark.parametrize('doc, label, sections', REQUIRED_SECTIONS,
+                         ids=[doc for doc, _, _ in REQUIRED_SECTIONS])
+def test_required_sections(pdw_sources, doc, label, sections):
     """
-    Test that technical specification contains all required sections
+    Test that each documentation file contains all of its required sections
     """
-    with open('PDW_Technical_Specification.md', 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    required_sections = [
-        'Executive Summary',
-        'System Architecture', 
-        'Database Schema',
-        'Error Handling',
-        'Dependencies and Requirements'
-    ]
-    
-    for section in required_sections:
-        assert section in content, f"Technical specification missing required section: {section}"
+    missing = _missing_sections(pdw_sources[doc], sections)
+    assert not missing, f"{label} missing required sections: {sorted(missing)}"
 
 
-def test_functional_spec_required_sections():
+def test_documented_names_non_ascii():
     """
-    Test that functional specification contains all required sections
+    Test that documented function and component names may contain non-ASCII letters
     """
-    with open('PDW_Functional_Specification.md', 'r', encoding='utf-8') as f:
-        content = f.read()
+    validator = DocumentationValidator(SOURCE_FILE, DOCS_DIR, source_code='')
+    doc = '### Configuração do Sistema\n\n**Posição:** saldo\n\nVer `cálculo()`.\n'
     
-    required_sections = [
-        'Business Context',
-        'Business Processes',
-        'Business Rules',
-        'User Interactions'
-    ]
-    
-    for section in required_sections:
-        assert section in content, f"Functional specification missing required section: {section}"
+    assert 'Configuração do Sistema' in validator.get_documented_components(doc)
+    assert 'Posição' in validator.get_documented_components(doc)
+    assert 'cálculo' in validator.get_documented_functions(doc)
 
 
-def test_deployment_guide_required_sections():
+def test_empty_documentation_reports_missing_sections(tmp_path):
     """
-    Test that deployment guide contains all required sections
+    Test that an empty documentation file yields missing sections rather than a mapping error
     """
-    with open('PDW_Deployment_Guide.md', 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    required_sections = [
-        'System Requirements',
-        'Installation Instructions',
-        'Configuration Setup',
-        'Troubleshooting Guide'
-    ]
+    empty_doc = tmp_path / 'empty.md'
+    empty_doc.write_bytes(b'')
     
-    for section in required_sections:
-        assert section in content, f"Deployment guide missing required section: {section}"
+    assert _missing_sections(_map_file(str(empty_doc)), TECH_SPEC_SECTIONS) == set(TECH_SPEC_SECTIONS)
+
+
+def test_missing_sections_overlapping_titles():
+    """
+    Test that section titles occurring only as overlapping matches are still found
+    """
+    content = b'## Configuration Setup Guide'
+    sections = ('Configuration Setup', 'Setup Guide', 'Troubleshooting Guide')
+    assert _missing_sections(content, sections) == {'Troubleshooting Guide'}
 
 
 if __name__ == "__main__":
     # Run basic validation tests
     test_documentation_structure_completeness()
-    test_all_source_functions_documented()
-    test_technical_spec_required_sections()
-    test_functional_spec_required_sections()
-    test_deployment_guide_required_sections()
+    test_all_source_functions_documented(_SOURCES)
+    for doc, label, sections in REQUIRED_SECTIONS:
+        test_required_sections(_SOURCES, doc, label, sections)
+    _SOURCES.close()
     print("All documentation structure validation tests passed!")
\ No newline at end of file